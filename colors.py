@@ -0,0 +1,31 @@
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+def asset_order(assets: pd.Series) -> tuple:
+    """
+    Returns the distinct asset names in the order they appear.
+
+    Parameters:
+    assets (pd.Series): The 'assets' column, either categorical (as loaded by the dashboard) or plain strings.
+
+    Returns:
+    tuple: The asset names, read from the categories when available instead of scanning the column.
+    """
+    if isinstance(assets.dtype, pd.CategoricalDtype):
+        return tuple(assets.cat.categories)
+    return tuple(assets.unique())
+
+@st.cache_data
+def make_color_map(assets: tuple) -> dict:
+    """
+    Builds the color map shared by the asset comparison plots.
+
+    Parameters:
+    assets (tuple): The asset names, in the order the colors should be assigned.
+
+    Returns:
+    dict: A dictionary mapping each asset to a color from the Plotly qualitative palette.
+    """
+    palette = px.colors.qualitative.Plotly
+    return {asset: palette[i % 10] for i, asset in enumerate(assets)}
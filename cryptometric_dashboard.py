@@ -1,3 +1,4 @@
+import os
 import streamlit as st
 import pandas as pd
 from price import get_assets_data
@@ -7,20 +8,53 @@ from staking import display_staking_data
 st.set_page_config(layout="wide")
 st.title("Cryptocurrency Asset Metrics")
 
+@st.cache_data
+def load_staking(path: str, mtime: float) -> pd.DataFrame:
+    """
+    Loads the staking data, with the asset names stored as a categorical.
+
+    Parameters:
+    path (str): The path to the staking CSV file.
+    mtime (float): The modification time of the file. It is not used directly, but makes edits to the file invalidate the cache.
+
+    Returns:
+    pd.DataFrame: The staking data, one row per asset.
+    """
+    df = pd.read_csv(path)
+
+    # Store asset names as a categorical, keeping the file order for the categories
+    df['assets'] = pd.Categorical(df['assets'], categories=df['assets'].unique())
+    return df
+
+@st.cache_data
+def load_price(path: str, mtime: float) -> pd.DataFrame:
+    """
+    Loads the price data, with the asset names stored as a categorical and the numeric columns parsed as float.
+
+    Parameters:
+    path (str): The path to the price CSV file.
+    mtime (float): The modification time of the file. It is not used directly, but makes edits to the file invalidate the cache.
+
+    Returns:
+    pd.DataFrame: The price data, one row per asset.
+    """
+    # The file uses commas as decimal separators, let the C parser convert them directly to float
+    df = pd.read_csv(path, decimal=',')
+
+    # Store asset names as a categorical, keeping the file order for the categories
+    df['assets'] = pd.Categorical(df['assets'], categories=df['assets'].unique())
+    return df
+
 # Load the CSV file with staking data
 file_path_staking = 'offline_data/staking_data.csv'
-df_staking = pd.read_csv(file_path_staking)
-
-# Convert staking data to more readable formats
-df_staking['staking_marketcap'] = df_staking['staking_marketcap'].apply(lambda x: f"${x/1e9:.1f}B")
-df_staking['net_issuance'] = df_staking['net_issuance'].apply(lambda x: f"${x/1e9:.1f}B")
+df_staking = load_staking(file_path_staking, os.path.getmtime(file_path_staking))
 
 # Load the CSV file with price data
 file_path_prices = "offline_data/price_data.csv"
-df_price = pd.read_csv(file_path_prices)
+df_price = load_price(file_path_prices, os.path.getmtime(file_path_prices))
 
 # Get the list of assets for price data
-assets = df_price['assets'].unique()
+assets = df_price['assets'].cat.categories.to_numpy()
 
 # Create a switch to toggle between staking data and price data
 view_option = st.selectbox("Select Data View", ("Staking Metrics", "Price Metrics"))
@@ -0,0 +1,45 @@
+import math
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+@st.cache_data
+def make_facet_bars(df: pd.DataFrame, id_vars, title, color_discrete_map, log_y=False):
+    """
+    Builds a single faceted bar figure comparing every metric column between assets, one facet per metric.
+
+    Parameters:
+    df (pd.DataFrame): A DataFrame with one row per asset, the asset column and one column per metric.
+    id_vars (str): The name of the asset column, used for the x-axis and the colors.
+    title (str): The title of the figure.
+    color_discrete_map (dict): A dictionary mapping each asset to its color.
+    log_y (bool): Whether to use logarithmic y-axes. Non-positive values are left out in that case.
+
+    Returns:
+    plotly.graph_objects.Figure: The faceted bar figure, with an independent y-axis per metric.
+    """
+    # Long form: one row per (asset, metric) pair
+    df_long = df.melt(id_vars=id_vars, var_name='metric', value_name='value')
+
+    if log_y:
+        # Non-positive values cannot be drawn on a log axis, drop them in bulk instead of sending them to Plotly
+        df_long = df_long[df_long['value'] > 0]
+    n_rows = math.ceil(df_long['metric'].nunique() / 3)
+
+    fig = px.bar(
+        df_long, 
+        x=id_vars, 
+        y='value', 
+        title=title, 
+        facet_col='metric', 
+        facet_col_wrap=3, 
+        facet_row_spacing=0.06, 
+        color=id_vars, 
+        color_discrete_map=color_discrete_map, 
+        log_y=log_y, 
+        height=300 * n_rows
+    )
+    # Every metric has its own scale
+    fig.update_yaxes(matches=None, showticklabels=True, title_text=None)
+    fig.for_each_annotation(lambda a: a.update(text=a.text.split('=', 1)[-1].capitalize().replace('_', ' ')))
+    return fig
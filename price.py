@@ -1,80 +1,192 @@
+import functools
 import math
+import numpy as np
 import pandas as pd
-import plotly.express as px
 import streamlit as st
+from colors import asset_order, make_color_map
+from plots import make_facet_bars
+
+try:
+    import numexpr as ne
+except ImportError:  # numexpr is optional, calculations falls back to plain NumPy
+    ne = None
+
+# Minimum number of assets before calculations uses numba (or numexpr). Once compiled, the numba kernel is faster
+# than NumPy at any size; the threshold only spares small tables, such as the shipped data, the numba import and the
+# one-time JIT compile (or on-disk cache load), which take far longer than the calculations themselves.
+KERNEL_MIN_ASSETS = 1_000
+
+# Keys of the dictionary returned by calculations, in the order the kernel returns them
+CALCULATION_KEYS = (
+    "Buyback Nominal Amount", "Cash Dividend", "Ordinary Shares", "Cash Dividend Yield", "Scrip Dividend",
+    "Scrip Dividend Yield", "Buyback Yield", "Preferential Shares Staker", "Ordinary Shares Staker", "Participant Dilution"
+)
 
 def clean_numeric_columns(asset_data: pd.DataFrame):
     """
-    Cleans numeric columns in a DataFrame by removing commas and converting them to float.
+    Cleans numeric columns in a DataFrame by removing commas and converting them to float64.
 
     Parameters:
     asset_data (pd.DataFrame): A DataFrame containing asset data, where the first column is assumed to be 'assets' (string),
                                and the remaining columns are numeric values possibly stored as strings with commas.
 
     Returns:
-    pd.DataFrame: The modified DataFrame with numeric columns converted to float.
+    pd.DataFrame: The modified DataFrame with numeric columns converted to float64.
     """
     numeric_columns = asset_data.columns[1:]  # Assuming first column is 'assets' (string)
+    object_columns = asset_data[numeric_columns].select_dtypes(include='object').columns
+    for col in object_columns:
+        # Replace commas with periods before conversion
+        asset_data[col] = pd.to_numeric(asset_data[col].str.replace(',', '.', regex=False))
+
+    # Make every numeric column float64 so the calculations can use the arrays as they are,
+    # leaving the columns that already are float64 untouched
     for col in numeric_columns:
-        if asset_data[col].dtype == object:
-            # Replace commas with periods before conversion
-            asset_data[col] = asset_data[col].apply(lambda x: float(str(x).replace(',', '.')) if isinstance(x, str) else x)
+        if asset_data[col].dtype != 'float64':
+            asset_data[col] = asset_data[col].astype('float64')
 
     return asset_data
 
-def format_value(value, column):
+# Column groups (lowercased) used to pick a display format, see format_series
+DOLLAR_COLUMNS = {'scrip_dividend', 'price', 'earnings_per_share', 'price_to_earnings', 'scrip dividend'}
+PERCENT_COLUMNS = {'scrip_dividend_yield', 'reward_rate', 'cash dividend yield', 'scrip dividend yield', 'buyback yield',
+                   'preferential shares staker', 'ordinary shares staker', 'participant dilution'}
+MILLION_COLUMNS = {'circulating_supply', 'buyback_nominal_amount', 'cash dividend',
+                   'buyback nominal amount', 'earnings', 'ordinary shares'}
+
+def format_series(series: pd.Series, column):
     """
-    Formats a given value based on the type of metric specified by the column name.
+    Formats a whole column of values based on the type of metric specified by the column name.
 
     Parameters:
-    value (float): The numeric value to be formatted.
+    series (pd.Series): The numeric values to be formatted.
     column (str): The name of the column or metric type, which determines the formatting style.
 
     Returns:
-    str: The formatted string representation of the value, which may include currency symbols, 
-         percentage signs, or be scaled to millions, depending on the column type.
+    pd.Series: The formatted string representation of the values, which may include currency symbols,
+               percentage signs, or be scaled to millions, depending on the column type.
     """
-    if column.lower() in ['scrip_dividend', 'price', 'earnings_per_share', 'price_to_earnings','scrip dividend']:
-        return f"${value:,.3f}"  # Add dollar sign and format to 3 decimal places
-    elif column.lower() in ['scrip_dividend_yield', 'reward_rate', 'cash dividend yield','scrip dividend yield', 'buyback yield', 
-                            'preferential shares staker', 'ordinary shares staker', 'participant dilution' ]:
-        return f"{value * 100:.2f}%"  # Convert to percentage, assuming 1 = 100%
-    elif column.lower() in ['circulating_supply', 'buyback_nominal_amount', 'cash dividend', 
-                            'buyback nominal amount', 'earnings', "ordinary shares"]:
-        return f"{value / 1_000_000:,.2f}M"  # Format to millions
+    key = column.lower()
+    if key in DOLLAR_COLUMNS:
+        return series.map("${:,.3f}".format)  # Add dollar sign and format to 3 decimal places
+    elif key in PERCENT_COLUMNS:
+        return (series * 100).map("{:.2f}%".format)  # Convert to percentage, assuming 1 = 100%
+    elif key in MILLION_COLUMNS:
+        return (series / 1_000_000).map("{:,.2f}M".format)  # Format to millions
     else:
-        return f"{value:,.2f}"  # Default format for other metrics (2 decimal places)
+        return series.map("{:,.2f}".format)  # Default format for other metrics (2 decimal places)
+
+def _calculations_kernel(price, circulating_supply, earnings, base_fees, preferential_shares, inflation_factor):
+    """
+    Loop version of calculations over float64 arrays, compiled with numba (see _compiled_kernel) so that every
+    metric is computed in a single pass over memory. Returns a tuple of arrays in CALCULATION_KEYS order.
+    """
+    n = price.shape[0]
+    results = np.empty((len(CALCULATION_KEYS), n))
+    for i in range(n):
+        buyback_nominal_amount = earnings[i] * (base_fees / 100)
+        cash_dividend = earnings[i] * (1 - (base_fees / 100))
+        preferential_shares_amount = circulating_supply[i] * (preferential_shares / 100)
+        ordinary_shares = circulating_supply[i] * (1 - (preferential_shares / 100))
+        cash_dividend_yield = cash_dividend / (price[i] * preferential_shares_amount)
+        scrip_dividend = inflation_factor * math.sqrt(preferential_shares_amount)
+        scrip_dividend_yield = scrip_dividend / preferential_shares_amount
+        buyback_yield = buyback_nominal_amount / (circulating_supply[i] * price[i])
+        preferential_shares_staker = cash_dividend_yield + scrip_dividend_yield
+        ordinary_shares_staker = (cash_dividend_yield - buyback_yield) / buyback_yield
+
+        results[0, i] = buyback_nominal_amount
+        results[1, i] = cash_dividend
+        results[2, i] = ordinary_shares
+        results[3, i] = cash_dividend_yield
+        results[4, i] = scrip_dividend
+        results[5, i] = scrip_dividend_yield
+        results[6, i] = buyback_yield
+        results[7, i] = preferential_shares_staker
+        results[8, i] = ordinary_shares_staker
+        results[9, i] = abs(preferential_shares_staker - ordinary_shares_staker)
+
+    return (results[0], results[1], results[2], results[3], results[4],
+            results[5], results[6], results[7], results[8], results[9])
+
+@functools.lru_cache(maxsize=None)
+def _compiled_kernel():
+    """
+    Compiles _calculations_kernel with numba on first use. numba is optional and imported here, so that it is only
+    loaded once a large asset table needs it.
+
+    Returns:
+    function or None: The compiled kernel, or None when numba is not installed.
+    """
+    try:
+        from numba import njit
+    except ImportError:  # calculations falls back to numexpr or plain NumPy
+        return None
+    # error_model='numpy' keeps NumPy's inf/nan results on division by zero instead of raising
+    return njit(cache=True, error_model='numpy')(_calculations_kernel)
+
+def _calculations_numexpr(price, circulating_supply, earnings, base_fees, preferential_shares, inflation_factor):
+    """
+    numexpr version of calculations over float64 arrays, used for large asset tables when numba is not installed.
+    Each expression is fused into one pass without intermediate temporaries, but every evaluate call still
+    allocates its own output array. Returns a tuple of arrays in CALCULATION_KEYS order.
+    """
+    buyback_nominal_amount = ne.evaluate('earnings * (base_fees / 100)')
+    cash_dividend = ne.evaluate('earnings * (1 - (base_fees / 100))')
+    preferential_shares_amount = ne.evaluate('circulating_supply * (preferential_shares / 100)')
+    ordinary_shares = ne.evaluate('circulating_supply * (1 - (preferential_shares / 100))')
+    cash_dividend_yield = ne.evaluate('cash_dividend / (price * preferential_shares_amount)')
+    scrip_dividend = ne.evaluate('inflation_factor * sqrt(preferential_shares_amount)')
+    scrip_dividend_yield = ne.evaluate('scrip_dividend / preferential_shares_amount')
+    buyback_yield = ne.evaluate('buyback_nominal_amount / (circulating_supply * price)')
+    preferential_shares_staker = ne.evaluate('cash_dividend_yield + scrip_dividend_yield')
+    ordinary_shares_staker = ne.evaluate('(cash_dividend_yield - buyback_yield) / buyback_yield')
+    participant_dilution = ne.evaluate('abs(preferential_shares_staker - ordinary_shares_staker)')
+
+    return (buyback_nominal_amount, cash_dividend, ordinary_shares, cash_dividend_yield, scrip_dividend,
+            scrip_dividend_yield, buyback_yield, preferential_shares_staker, ordinary_shares_staker, participant_dilution)
 
 def calculations(price, circulating_supply, earnings, base_fees, preferential_shares, inflation_factor):
     """
     Performs financial calculations related to dividends, shares, and yields based on input parameters.
+    All arithmetic is elementwise, so `price`, `circulating_supply` and `earnings` may be scalars or
+    arrays holding one value per asset.
 
     Parameters:
-    price (float): The current price of the asset.
-    circulating_supply (float): The total circulating supply of the asset.
-    earnings (float): The total earnings of the asset.
+    price (float or np.ndarray): The current price of the asset(s), as float64 for arrays.
+    circulating_supply (float or np.ndarray): The total circulating supply of the asset(s), as float64 for arrays.
+    earnings (float or np.ndarray): The total earnings of the asset(s), as float64 for arrays.
     base_fees (float): The base fees percentage used to calculate buyback and cash dividends.
     preferential_shares (float): The percentage of shares that are preferential.
     inflation_factor (float): The factor used to calculate the scrip dividend.
 
     Returns:
-    dict: A dictionary containing calculated financial metrics including buyback nominal amount, cash dividend, 
+    dict: A dictionary containing calculated financial metrics (scalars or arrays, matching the inputs) including buyback nominal amount, cash dividend, 
           ordinary shares, cash dividend yield, scrip dividend, scrip dividend yield, buyback yield, 
           preferential shares staker, ordinary shares staker, and participant dilution.
     """
+    # Large asset tables go through the compiled kernel when numba is available, or numexpr otherwise
+    if np.ndim(earnings) == 1 and len(earnings) >= KERNEL_MIN_ASSETS:
+        args = (price, circulating_supply, earnings, float(base_fees), float(preferential_shares), float(inflation_factor))
+        kernel = _compiled_kernel()
+        if kernel is not None:
+            return dict(zip(CALCULATION_KEYS, kernel(*args)))
+        if ne is not None:
+            return dict(zip(CALCULATION_KEYS, _calculations_numexpr(*args)))
+
     # Earnings and dividends
-    buyback_nominal_amount = float(earnings) * (base_fees / 100)
-    cash_dividend = float(earnings) * (1 - (base_fees / 100))
+    buyback_nominal_amount = earnings * (base_fees / 100)
+    cash_dividend = earnings * (1 - (base_fees / 100))
 
     # Shares
-    preferential_shares_amount = float(circulating_supply) * (preferential_shares / 100)
-    ordinary_shares = float(circulating_supply) * (1 - (preferential_shares / 100))
+    preferential_shares_amount = circulating_supply * (preferential_shares / 100)
+    ordinary_shares = circulating_supply * (1 - (preferential_shares / 100))
 
     # Cash dividend yield
     cash_dividend_yield = (cash_dividend ) / (price * preferential_shares_amount) 
 
     # Scrip dividend and yield
-    scrip_dividend = inflation_factor * math.sqrt(preferential_shares_amount)
+    scrip_dividend = inflation_factor * np.sqrt(preferential_shares_amount)
     scrip_dividend_yield = scrip_dividend  / (preferential_shares_amount ) 
 
     # Buyback yield
@@ -85,129 +197,58 @@ def calculations(price, circulating_supply, earnings, base_fees, preferential_sh
     ordinary_shares_staker = (cash_dividend_yield - buyback_yield) / buyback_yield
 
     # Participant dilution
-    participant_dilution = abs(preferential_shares_staker - ordinary_shares_staker)
-
-    return {
-        "Buyback Nominal Amount": buyback_nominal_amount,
-        "Cash Dividend": cash_dividend,
-        "Ordinary Shares": ordinary_shares,
-        "Cash Dividend Yield": cash_dividend_yield,
-        "Scrip Dividend": scrip_dividend,
-        "Scrip Dividend Yield": scrip_dividend_yield,
-        "Buyback Yield": buyback_yield,
-        "Preferential Shares Staker": preferential_shares_staker,
-        "Ordinary Shares Staker": ordinary_shares_staker,
-        "Participant Dilution": participant_dilution
-    }
-
-def display_metrics_as_formated_list(asset_data: pd.DataFrame, base_fees, preferential_shares, inflation_factor):
+    participant_dilution = np.abs(preferential_shares_staker - ordinary_shares_staker)
+
+    return dict(zip(CALCULATION_KEYS, (
+        buyback_nominal_amount, cash_dividend, ordinary_shares, cash_dividend_yield, scrip_dividend,
+        scrip_dividend_yield, buyback_yield, preferential_shares_staker, ordinary_shares_staker, participant_dilution
+    )))
+
+@st.cache_data
+def compute_assets_metrics(df_price: pd.DataFrame, base_fees, preferential_shares, inflation_factor):
     """
-    Formats and returns a list of financial metrics for a given asset.
+    Computes the formatted and unformatted metrics tables for every asset.
 
     Parameters:
-    asset_data (pd.DataFrame): A DataFrame containing data for a specific asset, including price, circulating supply, and earnings.
+    df_price (pd.DataFrame): A DataFrame containing the raw price data, one row per asset.
     base_fees (float): The base fees percentage used in financial calculations.
     preferential_shares (float): The percentage of shares that are preferential.
     inflation_factor (float): The factor used to calculate the scrip dividend.
 
     Returns:
-    dict: A dictionary containing the asset's name and formatted financial metrics, including cash dividend, cash dividend yield,
-          preferential shares staker, scrip dividend, scrip dividend yield, ordinary shares staker, and participant dilution.
+    tuple: The formatted metrics DataFrame (for display) and the unformatted one (for plots).
     """
-    # Retrieve the relevant data for calculations
-    price = asset_data['price'].values[0]
-    circulating_supply = asset_data['circulating_supply'].values[0]
-    earnings = asset_data['Earnings'].values[0]
-
-    calculated_data = calculations(price, circulating_supply, earnings, base_fees, preferential_shares, inflation_factor)
-
-    # Collect formatted metrics in a dictionary
-    metrics = {
-        "Asset": asset_data['assets'].values[0]
-    }
-
-    for column in asset_data.columns[1:]:
-        if column == 'Market Cap':
-            continue
-        value = asset_data[column].values[0]
-        formatted_value = format_value(value, column)
-        metrics[column] = formatted_value
-
-    # Add calculated metrics to the dictionary
-    metrics.update({
-        "Cash Dividend": format_value(calculated_data['Cash Dividend'], 'Cash Dividend'),
-        "Cash Dividend Yield": format_value(calculated_data['Cash Dividend Yield'], 'Cash Dividend Yield'),
-        "Preferential Shares Staker": format_value(calculated_data['Preferential Shares Staker'], 'Preferential Shares Staker'),
-        "Scrip Dividend": format_value(calculated_data['Scrip Dividend'], 'Scrip Dividend'),
-        "Scrip Dividend Yield": format_value(calculated_data['Scrip Dividend Yield'], 'Scrip Dividend Yield'),
-        "Ordinary Shares Staker": format_value(calculated_data['Ordinary Shares Staker'], 'Ordinary Shares Staker'),
-        "Participant Dilution": format_value(calculated_data['Participant Dilution'], 'Participant Dilution')
-    })
+    # Clean numeric columns to handle comma-separated values
+    df_price = clean_numeric_columns(df_price)
 
-    return metrics
-
-def display_metrics_as_list(asset_data: pd.DataFrame, base_fees, preferential_shares, inflation_factor):
-    # Retrieve the relevant data for calculations
-    price = asset_data['price'].values[0]
-    circulating_supply = asset_data['circulating_supply'].values[0]
-    earnings = asset_data['Earnings'].values[0]
-
-    calculated_data = calculations(price, circulating_supply, earnings, base_fees, preferential_shares, inflation_factor)
-
-    # Collect formatted metrics in a dictionary
-    metrics = {
-        "Asset": asset_data['assets'].values[0]
-    }
-
-    for column in asset_data.columns[1:]:
-        if column == 'Market Cap':
-            continue
-        value = asset_data[column].values[0]
-        metrics[column] = value
-
-    # Add calculated metrics to the dictionary
-    metrics.update({
-        "Cash Dividend": calculated_data['Cash Dividend'],
-        "Cash Dividend Yield": calculated_data['Cash Dividend Yield'],
-        "Preferential Shares Staker": calculated_data['Preferential Shares Staker'],
-        "Scrip Dividend": calculated_data['Scrip Dividend'],
-        "Scrip Dividend Yield": calculated_data['Scrip Dividend Yield'],
-        "Ordinary Shares Staker": calculated_data['Ordinary Shares Staker'],
-        "Participant Dilution": calculated_data['Participant Dilution']
+    # Keep the first row of each asset, in a single hashed pass over the 'assets' column
+    df_price = df_price.groupby('assets', sort=False, observed=True).head(1)
+
+    # Run the calculations for all assets at once
+    calculated_data = calculations(df_price['price'].to_numpy(), df_price['circulating_supply'].to_numpy(),
+                                   df_price['Earnings'].to_numpy(), base_fees, preferential_shares, inflation_factor)
+
+    # Assemble the raw metrics column by column from the arrays
+    df_metrics_plots = pd.DataFrame({
+        "Asset": df_price['assets'].to_numpy(),
+        **{column: df_price[column].to_numpy() for column in df_price.columns[1:] if column != 'Market Cap'},
+        **{column: calculated_data[column] for column in [
+            'Cash Dividend', 'Cash Dividend Yield', 'Preferential Shares Staker', 'Scrip Dividend',
+            'Scrip Dividend Yield', 'Participant Dilution'
+        ]}
     })
 
-    return metrics
-
-
+    # Derive the display table from the raw metrics, formatting each column in one pass
+    df_metrics = pd.DataFrame({
+        "Asset": df_metrics_plots['Asset'],
+        **{column: format_series(df_metrics_plots[column], column) for column in df_metrics_plots.columns[1:]}
+    })
 
+    return df_metrics, df_metrics_plots
 
 def get_assets_data(df_price: pd.DataFrame):
-    all_assets_data = []
-    all_assets_data_plots = []
-    # Clean numeric columns to handle comma-separated values
-    df_price = clean_numeric_columns(df_price)
+    df_metrics, df_metrics_plots = compute_assets_metrics(df_price, base_fees=90, preferential_shares=25, inflation_factor=166.3)
 
-    for asset in df_price['assets'].unique():
-        asset_data = df_price[df_price['assets'] == asset]
-        
-        if asset_data.empty:
-            st.write(f"Asset {asset} not found.")
-            continue
-        
-
-        # Get metrics for the asset
-        metrics = display_metrics_as_formated_list(asset_data, base_fees=90, preferential_shares=25, inflation_factor=166.3)
-        all_assets_data.append(metrics)
-        metrics_unformated = display_metrics_as_list(asset_data, base_fees=90, preferential_shares=25, inflation_factor=166.3)
-        all_assets_data_plots.append(metrics_unformated)
-
-    # Convert the list of dictionaries to a DataFrame
-    df_metrics = pd.DataFrame(all_assets_data)
-    df_metrics_plots = pd.DataFrame(all_assets_data_plots)
-
-    df_metrics.drop(columns=['Ordinary Shares Staker'], inplace=True)
-    df_metrics_plots.drop(columns=['Ordinary Shares Staker'], inplace=True)
-    
     # Display the DataFrame in Streamlit
     
     # Split the DataFrame into two parts
@@ -220,21 +261,8 @@ def get_assets_data(df_price: pd.DataFrame):
     st.write("### Shareholder and Dilution Metrics")
     st.dataframe(df_part2, use_container_width=True)
     # Plot comparisons for each metric
-    color_discrete_map = {asset: px.colors.qualitative.Plotly[i % 10] for i, asset in enumerate(df_price['assets'].unique())}
+    color_discrete_map = make_color_map(asset_order(df_price['assets']))
     
-    metrics = df_metrics.columns.tolist()[1:]
-    print(metrics)
-    print(df_metrics)
-    for metric in metrics:
-        st.write(f"### {metric.capitalize().replace('_', ' ')} Comparison")
-        fig = px.bar(
-            df_metrics_plots, 
-            x='Asset', 
-            y=metric, 
-            title=f'{metric.capitalize().replace("_", " ")} Comparison between Assets', 
-            color='Asset', 
-            color_discrete_map=color_discrete_map
-        )
-        fig.update_yaxes(type='log')  # Set y-axis to logarithmic scale
-        st.plotly_chart(fig)
-
+    st.write("### Metrics Comparison")
+    fig = make_facet_bars(df_metrics_plots, 'Asset', 'Metrics Comparison between Assets', color_discrete_map, log_y=True)
+    st.plotly_chart(fig, use_container_width=True)
@@ -1,12 +1,13 @@
 import pandas as pd
-import plotly.express as px
 import streamlit as st
+from colors import asset_order, make_color_map
+from plots import make_facet_bars
 
 def display_staking_data(df_staking: pd.DataFrame) -> None:
     """
-    This function displays staking metrics data in a user-friendly format. It converts 'inflation_rate' and 'reward_rate' 
-    columns to percentage format and displays the dataframe with these values. It also generates bar plots for each metric 
-    comparison between assets.
+    This function displays staking metrics data in a user-friendly format. It shows 'inflation_rate' and 'reward_rate' 
+    columns in percentage format and 'staking_marketcap' and 'net_issuance' in billions of dollars, keeping the underlying 
+    values numeric. It also generates bar plots for each metric comparison between assets.
 
     Parameters:
     df_staking (pd.DataFrame): A pandas DataFrame containing staking metrics data. The DataFrame should have at least two columns: 'assets' and other metric columns.
@@ -14,32 +15,25 @@ def display_staking_data(df_staking: pd.DataFrame) -> None:
     Returns:
     None: The function does not return any value. It displays the staking metrics data and plots using Streamlit.
     """
-    # Create a copy of the dataframe for display purposes
-    df_display = df_staking.copy()
-
-    # Convert 'inflation_rate' and 'reward_rate' to percentage format and add the '%' sign in the copied dataframe for display
-    if 'inflation_rate' in df_display.columns:
-        df_display['inflation_rate'] = df_display['inflation_rate'].apply(lambda x: f"{x * 100:.2f}%")
-    if 'reward_rate' in df_display.columns:
-        df_display['reward_rate'] = df_display['reward_rate'].apply(lambda x: f"{x * 100:.2f}%")
+    # Display formats, applied through a Styler so the values stay numeric (and sortable) without copying the dataframe
+    formats = {
+        'inflation_rate': '{:.2%}',
+        'reward_rate': '{:.2%}',
+        'staking_marketcap': lambda x: f"${x / 1e9:.1f}B",
+        'net_issuance': lambda x: f"${x / 1e9:.1f}B"
+    }
+    styler = df_staking.style.format({col: fmt for col, fmt in formats.items() if col in df_staking.columns})
 
     # Show the dataframe with percentage formatted values
     st.write("### Staking Metrics Data (with percentages for inflation and reward rates)")
-    st.dataframe(df_display)
+    st.dataframe(styler)
 
     # Define a custom color palette for the assets
-    color_discrete_map = {asset: px.colors.qualitative.Plotly[i % 10] for i, asset in enumerate(df_staking['assets'].unique())}
-
-    # Metrics for comparison (excluding the 'assets' column)
-    staking_metrics = df_staking.columns.tolist()[1:]  
-
-    # Iterate through the metrics and handle percentage columns
-    for metric in staking_metrics:
-        # Plot the comparison for each metric (without modifying the original values)
-        st.write(f"### {metric.capitalize().replace('_', ' ')} Comparison")
-        fig = px.bar(df_staking, x='assets', y=metric, title=f'{metric.capitalize().replace("_", " ")} Comparison between Assets', 
-                     color='assets', color_discrete_map=color_discrete_map)
+    color_discrete_map = make_color_map(asset_order(df_staking['assets']))
 
-        # Display the plot
-        st.plotly_chart(fig)
+    # Plot the comparison for all metrics at once (without modifying the original values)
+    st.write("### Staking Metrics Comparison")
+    fig = make_facet_bars(df_staking, 'assets', 'Staking Metrics Comparison between Assets', color_discrete_map)
 
+    # Display the plot
+    st.plotly_chart(fig, use_container_width=True)